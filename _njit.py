@@ -0,0 +1,14 @@
+# numba.njit when numba is importable, otherwise a no-op decorator so the
+# decorated functions run as plain Python. Check HAVE_NUMBA to pick a
+# faster non-JIT path where one exists.
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # numba missing or broken
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        # Support both @njit and @njit(...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
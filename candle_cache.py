@@ -0,0 +1,57 @@
+import os
+import time
+
+import numpy as np
+
+# One .npy file per market, holding a float64 (n, 2) array of
+# [candle start time, close], oldest first
+CACHE_DIR = os.path.join(".cache", "candles")
+TS, CLOSE = 0, 1
+
+# market -> candles, loaded once by load_all() and kept in sync with disk
+_cache: dict[str, np.ndarray] = {}
+# market -> unix time its candles were last stored by put(); on disk this
+# is the file's mtime
+_fetched_at: dict[str, float] = {}
+
+
+def load_all() -> int:
+    """Load every market's cached candles from CACHE_DIR; return how many."""
+    if not os.path.isdir(CACHE_DIR):
+        return 0
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith(".npy"):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            candles = np.load(path)
+            stored = os.path.getmtime(path)
+        except (OSError, ValueError):
+            continue  # corrupt/partial file: just refetch that market
+        if candles.ndim == 2 and candles.shape[1] == 2:
+            market = name[:-len(".npy")]
+            _cache[market] = candles
+            _fetched_at[market] = stored
+    return len(_cache)
+
+
+def get(market: str) -> np.ndarray | None:
+    """Cached candles for a market, or None."""
+    return _cache.get(market)
+
+
+def fetched_at(market: str) -> float | None:
+    """When a market's cached candles were stored, or None if unknown."""
+    return _fetched_at.get(market)
+
+
+def put(market: str, candles: np.ndarray) -> None:
+    """Replace a market's candles in memory and atomically on disk."""
+    _cache[market] = candles
+    _fetched_at[market] = time.time()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"{market}.npy")
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, candles)
+    os.replace(tmp, path)
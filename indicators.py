@@ -0,0 +1,205 @@
+from collections import deque
+
+import numpy as np
+
+from _njit import HAVE_NUMBA, njit
+
+# Indicator windows used by the market scorer
+SHORT_MA_PERIOD = 9
+LONG_MA_PERIOD = 21
+RSI_PERIOD = 14
+
+# IndicatorState re-derives its sums from scratch after this many
+# incremental updates, so float rounding can't build up
+RESEED_EVERY = 100
+
+
+@njit(cache=True)
+def _sums_jit(closes: np.ndarray) -> tuple[float, float, float, float, float, float]:
+    """
+    Single pass over closes returning the running sums behind every
+    indicator: (short_sum, long_sum, gain, loss, abs_pct, moves).
+    Each window sum covers as many trailing values as are available.
+    """
+    n = closes.shape[0]
+    short_sum = 0.0
+    long_sum = 0.0
+    gain = 0.0
+    loss = 0.0
+    abs_pct = 0.0
+    moves = 0.0
+
+    for i in range(n):
+        c = closes[i]
+        if i >= n - SHORT_MA_PERIOD:
+            short_sum += c
+        if i >= n - LONG_MA_PERIOD:
+            long_sum += c
+        if i == 0:
+            continue
+        prev = closes[i - 1]
+        diff = c - prev
+        if i >= n - RSI_PERIOD:
+            # Branchless split so the loop vectorises
+            gain += max(diff, 0.0)
+            loss += max(-diff, 0.0)
+        if prev != 0:
+            abs_pct += abs(diff / prev)
+            moves += 1.0
+
+    return short_sum, long_sum, gain, loss, abs_pct, moves
+
+
+def _sums_numpy(closes: np.ndarray) -> tuple[float, float, float, float, float, float]:
+    """Vectorised NumPy equivalent of _sums_jit, for when numba is unavailable."""
+    diffs = np.diff(closes)
+    recent = diffs[-RSI_PERIOD:]
+    prev = closes[:-1]
+    ok = prev != 0
+    return (
+        float(closes[-SHORT_MA_PERIOD:].sum()),
+        float(closes[-LONG_MA_PERIOD:].sum()),
+        float(np.maximum(recent, 0.0).sum()),
+        float(-np.minimum(recent, 0.0).sum()),
+        float(np.abs(diffs[ok] / prev[ok]).sum()),
+        float(ok.sum()),
+    )
+
+
+sums = _sums_jit if HAVE_NUMBA else _sums_numpy
+
+
+def from_sums(n: int, short_sum: float, long_sum: float, gain: float, loss: float,
+              abs_pct: float, moves: float) -> tuple[float, float, float, float]:
+    """
+    Turn the sums for n closes into (short_ma, long_ma, rsi, volatility).
+    Volatility is the average absolute % change per candle.
+    Any value whose window doesn't fit in n closes comes back as NaN.
+    """
+    short_ma = short_sum / SHORT_MA_PERIOD if n >= SHORT_MA_PERIOD else np.nan
+    long_ma = long_sum / LONG_MA_PERIOD if n >= LONG_MA_PERIOD else np.nan
+
+    if n <= RSI_PERIOD:
+        rsi = np.nan
+    elif loss <= 0:
+        rsi = 100.0
+    else:
+        rsi = 100.0 - 100.0 / (1.0 + max(gain, 0.0) / loss)
+
+    vol = abs_pct / moves if moves > 0 else np.nan
+    return short_ma, long_ma, rsi, vol
+
+
+def compute(closes: np.ndarray) -> tuple[float, float, float, float]:
+    """(short_ma, long_ma, rsi, volatility) for an array of closes."""
+    return from_sums(closes.shape[0], *sums(closes))
+
+
+class IndicatorState:
+    """
+    Running indicator sums for one market's candle window.
+    sync() moves the window onto the latest candles by removing/adding only
+    the rows that changed, so a typical cycle (oldest candle out, previous
+    in-progress candle revised, newest in) costs O(1), not a full pass.
+    """
+
+    def __init__(self):
+        self.ts = deque()
+        self.closes = deque()
+        self.short_sum = self.long_sum = 0.0
+        self.gain = self.loss = 0.0
+        self.abs_pct = self.moves = 0.0
+        self.updates = 0
+
+    def sync(self, ts: np.ndarray, closes: np.ndarray) -> tuple[float, float, float, float]:
+        """Bring the state in line with (ts, closes); return compute()'s values."""
+        if not self._advance(ts, closes):
+            self._seed(ts, closes)
+        return from_sums(len(self.closes), self.short_sum, self.long_sum,
+                         self.gain, self.loss, self.abs_pct, self.moves)
+
+    def _seed(self, ts: np.ndarray, closes: np.ndarray) -> None:
+        self.ts = deque(ts.tolist())
+        self.closes = deque(closes.tolist())
+        (self.short_sum, self.long_sum, self.gain, self.loss,
+         self.abs_pct, self.moves) = sums(closes)
+        self.updates = 0
+
+    def _advance(self, ts: np.ndarray, closes: np.ndarray) -> bool:
+        """Incrementally move onto (ts, closes); False if a reseed is needed."""
+        n = len(ts)
+        if not self.ts or not n or self.updates >= RESEED_EVERY or ts[0] < self.ts[0]:
+            return False
+
+        while self.ts and self.ts[0] < ts[0]:
+            self._pop_front()
+        m = len(self.ts)
+        if not m or m > n or self.ts[0] != ts[0] or self.ts[-1] != ts[m - 1]:
+            return False
+
+        # The newest stored candle may have been revised since
+        if self.closes[-1] != closes[m - 1]:
+            self._pop_back()
+            m -= 1
+        for i in range(m, n):
+            self._push(ts[i], closes[i])
+        if m != n:
+            self.updates += 1
+        return True
+
+    def _rsi_diff(self, diff: float, sign: float) -> None:
+        if diff > 0:
+            self.gain += sign * diff
+        else:
+            self.loss -= sign * diff
+
+    def _vol_diff(self, prev: float, c: float, sign: float) -> None:
+        if prev != 0:
+            self.abs_pct += sign * abs((c - prev) / prev)
+            self.moves += sign
+
+    def _push(self, t: float, c: float) -> None:
+        q = self.closes
+        n = len(q)
+        self.short_sum += c - (q[-SHORT_MA_PERIOD] if n >= SHORT_MA_PERIOD else 0.0)
+        self.long_sum += c - (q[-LONG_MA_PERIOD] if n >= LONG_MA_PERIOD else 0.0)
+        if n:
+            self._rsi_diff(c - q[-1], 1.0)
+            self._vol_diff(q[-1], c, 1.0)
+        if n > RSI_PERIOD:  # oldest diff slides out of the RSI window
+            self._rsi_diff(q[-RSI_PERIOD] - q[-RSI_PERIOD - 1], -1.0)
+        q.append(c)
+        self.ts.append(t)
+
+    def _pop_back(self) -> None:
+        q = self.closes
+        c = q.pop()
+        self.ts.pop()
+        n = len(q)
+        self.short_sum -= c - (q[-SHORT_MA_PERIOD] if n >= SHORT_MA_PERIOD else 0.0)
+        self.long_sum -= c - (q[-LONG_MA_PERIOD] if n >= LONG_MA_PERIOD else 0.0)
+        if n:
+            self._rsi_diff(c - q[-1], -1.0)
+            self._vol_diff(q[-1], c, -1.0)
+        if n > RSI_PERIOD:  # the diff that slid out comes back in
+            self._rsi_diff(q[-RSI_PERIOD] - q[-RSI_PERIOD - 1], 1.0)
+
+    def _pop_front(self) -> None:
+        q = self.closes
+        c = q.popleft()
+        self.ts.popleft()
+        n = len(q)
+        # c only counts towards a window while that window covers everything
+        if n < SHORT_MA_PERIOD:
+            self.short_sum -= c
+        if n < LONG_MA_PERIOD:
+            self.long_sum -= c
+        if n:
+            if n <= RSI_PERIOD:
+                self._rsi_diff(q[0] - c, -1.0)
+            self._vol_diff(c, q[0], -1.0)
+
+
+def warmup() -> None:
+    """Trigger JIT compilation so the first live scan isn't slowed down."""
+    compute(np.linspace(1.0, 2.0, 100))
@@ -1,14 +1,38 @@
 
-from decimal import Decimal, getcontext
+from decimal import Decimal
 from datetime import datetime, timezone, date
 import time
 import csv
-import requests
+import atexit
+import functools
+import json
+import math
 import os
+import queue
 import random
-
-# Higher precision for crypto maths
-getcontext().prec = 28
+import threading
+import numpy as np
+import indicators
+import candle_cache
+from rate_limit import RateLimited, TokenBucket
+from _njit import njit
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+except ImportError:  # fall back to the thread pool for market scans
+    aiohttp = None
+
+try:
+    import websockets
+except ImportError:  # open positions are then priced by REST polling only
+    websockets = None
+
+try:
+    from orjson import loads as json_loads  # much faster on numeric arrays
+except ImportError:
+    json_loads = json.loads
 
 # ============================================================
 # CONFIG
@@ -27,43 +51,96 @@ ALL_MARKETS = [
     "ARB-USD", "ATOM-USD", "SAND-USD", "UNI-USD", "RNDR-USD",
 ]
 
-# How many random markets to scan each cycle
+# How many markets to scan each cycle
 MAX_MARKETS_PER_SCAN = 8
 
+# Scan selection: this share of each scan goes to the markets with the best
+# score EMA (weight EMA_ALPHA on the newest score); the rest explores
+EXPLOIT_FRACTION = 0.8
+EMA_ALPHA = 0.3
+# A scan that fails the filters (scored -999) enters the EMA as this floor
+# instead, just below any passing score, so one failure can't swamp it
+EMA_FAIL_SCORE = 0.0
+# Only markets whose EMA is above this get exploit slots. It is about half
+# the weakest passing score (trend at MIN_TREND_STRENGTH scores ~2), so
+# failing markets, and ones whose last pass has decayed away, go back to
+# the rotation
+EMA_RANK_MIN = 1.0
+
 # Time settings
 SLEEP_SECONDS = 6 * 60           # 6 minutes
 CANDLE_GRANULARITY = 300         # 5-minute candles
 LOOKBACK_CANDLES = 100           # how many candles for indicators
 
+# Signal and risk thresholds are plain floats (hot path); money stays Decimal.
+
 # ---- Base (SAFE) risk parameters ----
-TAKE_PROFIT_PCT = Decimal("0.010")       # +1.0%
-STOP_LOSS_PCT = Decimal("-0.015")        # -1.5%
+TAKE_PROFIT_PCT = 0.010                  # +1.0%
+STOP_LOSS_PCT = -0.015                   # -1.5%
 POSITION_SIZE_FRACTION = Decimal("0.3")  # 30% of USD per new trade
 MAX_OPEN_POSITIONS = 1                   # one position at a time
 
-MIN_TREND_STRENGTH = Decimal("0.002")    # short MA > long MA by 0.2%
-RSI_BUY_MIN = Decimal("40")
-RSI_BUY_MAX = Decimal("65")
+MIN_TREND_STRENGTH = 0.002               # short MA > long MA by 0.2%
+RSI_BUY_MIN = 40.0
+RSI_BUY_MAX = 65.0
 
-MIN_VOLATILITY = Decimal("0.002")        # 0.2% avg move per candle
-MAX_VOLATILITY = Decimal("0.03")         # 3% avg move per candle
+MIN_VOLATILITY = 0.002                   # 0.2% avg move per candle
+MAX_VOLATILITY = 0.03                    # 3% avg move per candle
 
-MAX_DAILY_DRAWDOWN = Decimal("0.05")     # 5% daily drawdown limit
+# Pre-scan filter: a market's 24h (high-low)/low must lie within the
+# volatility band above scaled by this factor for its candles to be
+# fetched. 24 is a deliberately loose rule-of-thumb figure, not derived
+# (random-walk scaling over 288 five-minute candles would give sqrt(288),
+# about 17)
+STATS_RANGE_FACTOR = 24
+# 24h ranges barely move within this long, so the filter is reused for it
+STATS_REFRESH_SECONDS = 3600
+
+MAX_DAILY_DRAWDOWN = 0.05                # 5% daily drawdown limit
 MAX_LOSING_STREAK = 3                    # after 3 losses, pause
 
 # ---- Override for AGGRESSIVE mode ----
 if RISK_MODE == "AGGRESSIVE":
-    TAKE_PROFIT_PCT = Decimal("0.020")       # +2.0%
-    STOP_LOSS_PCT = Decimal("-0.03")         # -3.0%
+    TAKE_PROFIT_PCT = 0.020                  # +2.0%
+    STOP_LOSS_PCT = -0.03                    # -3.0%
     POSITION_SIZE_FRACTION = Decimal("0.5")  # 50% of USD
     MAX_OPEN_POSITIONS = 3                   # up to 3 coins at once
-    MIN_TREND_STRENGTH = Decimal("0.0015")   # slightly weaker trend allowed
-    RSI_BUY_MIN = Decimal("35")
-    RSI_BUY_MAX = Decimal("70")
-    MAX_DAILY_DRAWDOWN = Decimal("0.08")     # allow up to 8% daily loss
+    MIN_TREND_STRENGTH = 0.0015              # slightly weaker trend allowed
+    RSI_BUY_MIN = 35.0
+    RSI_BUY_MAX = 70.0
+    MAX_DAILY_DRAWDOWN = 0.08                # allow up to 8% daily loss
+
+# ---- Precomputed money constants used inside the main loop ----
+MIN_TRADE_USD = Decimal("5")             # min trade size (sim only)
+USD_QUANTUM = Decimal("0.01")            # cents
+COIN_QUANTUM = Decimal("0.00000001")     # 8 dp coin amounts
+ZERO_USD = Decimal("0.00")
 
 PUBLIC_API_BASE = "https://api.exchange.coinbase.com"
+CANDLES_URL_TMPL = PUBLIC_API_BASE + "/products/{}/candles"
+TICKER_URL_TMPL = PUBLIC_API_BASE + "/products/{}/ticker"
 TRADE_LOG = "live_sim_trade_history.csv"
+MARKET_EMA_FILE = os.path.join(".cache", "market_ema.json")
+
+# Cache lifetimes (seconds) for ticker prices and candles
+TICKER_TTL = 20                  # tickers barely move within one cycle
+CANDLE_TTL = 45                  # reuse a fetch this long, even mid-candle
+
+USER_AGENT = "crypto-bot/1"
+
+# Public websocket feed streaming ticker prices for open positions
+WS_FEED_URL = "wss://ws-feed.exchange.coinbase.com"
+WS_RECONNECT_SECONDS = 15
+
+# Coinbase public endpoints allow a burst of ~6 requests; cap in-flight calls
+MAX_CONCURRENT_REQUESTS = 6
+# ...and ~3 requests/second sustained, enforced by _HTTP_BUCKET
+API_RATE_PER_SEC = 3
+
+# Shared worker pool for blocking HTTP calls (market scans, ticker fetches);
+# more workers than allowed in-flight requests would only sit blocked
+HTTP_WORKERS = MAX_CONCURRENT_REQUESTS
+EXECUTOR = ThreadPoolExecutor(max_workers=HTTP_WORKERS)
 
 # ============================================================
 # STATE
@@ -71,28 +148,158 @@ TRADE_LOG = "live_sim_trade_history.csv"
 
 usd_balance = START_BALANCE_USD
 
-# list of open positions:
+# open positions, one row per index across parallel columns:
 # {
-#   "market": "BTC-USD",
-#   "amount": Decimal,
-#   "entry_price": Decimal,
-#   "entry_time": datetime
+#   "market": ["BTC-USD", ...],
+#   "amount": np.ndarray[float64],       (quantized to 8 dp)
+#   "entry_price": np.ndarray[float64],
+#   "entry_time": [datetime, ...]
 # }
-positions = []
+positions = {
+    "market": [],
+    "amount": np.empty(0, dtype=np.float64),
+    "entry_price": np.empty(0, dtype=np.float64),
+    "entry_time": [],
+}
 
 start_time = datetime.now(timezone.utc)
 trade_count = 0
 losing_streak = 0
 
-equity_peak_today = START_BALANCE_USD
+# Equity/drawdown bookkeeping is float; only balances are Decimal
+equity_peak_today = float(START_BALANCE_USD)
 today = date.today()
 trading_paused_for_today = False  # due to daily drawdown
 
-# Create trade log if needed
-if not os.path.exists(TRADE_LOG):
-    with open(TRADE_LOG, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
+# market -> (time.monotonic() when fetched, price)
+_TICKER_CACHE: dict[str, tuple[float, float]] = {}
+
+_NO_CANDLES = np.empty((0, 2), dtype=np.float64)
+
+# market -> running indicator sums over its cached candle window
+_INDICATOR_STATE: dict[str, indicators.IndicatorState] = {}
+_NO_METRICS = (np.nan,) * 5
+
+# market -> exponentially weighted average of its scan scores
+market_score_ema: dict[str, float] = {}
+
+# Shuffled once; exploration slots take the next eligible markets in it, so
+# every eligible market keeps getting scanned
+_scan_perm = ALL_MARKETS.copy()
+random.shuffle(_scan_perm)
+_scan_cursor = 0
+
+# Trade log handle, opened once by ensure_trade_log_exists() and flushed
+# once per cycle
+_TRADE_FH = None
+_TRADE_WRITER = None
+
+# Shared requests.Session, created on first use by _get_session()
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+# Global cap on in-flight blocking requests, across every thread
+_HTTP_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+# Request rate limiter shared by every REST call, blocking or async
+_HTTP_BUCKET = TokenBucket(rate=API_RATE_PER_SEC, capacity=MAX_CONCURRENT_REQUESTS)
+
+# Websocket ticker feed: the markets it should follow (rebound, never
+# mutated, so the feed thread can read it safely) and the (market, price)
+# ticks it pushes back to the main loop
+_ws_markets: frozenset = frozenset()
+_TICKS: queue.Queue = queue.Queue()
+
+# Scoring kernel with the current thresholds baked in (configure_scoring)
+_score_kernel = None
+
+# (unix second, formatted) of the last log timestamp
+_last_stamp: tuple[int, str] = (0, "")
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def to_decimal(price: float) -> Decimal:
+    """Convert a float price to Decimal for money maths (8 dp)."""
+    return Decimal(f"{price:.8f}")
+
+
+def utc_stamp() -> str:
+    """Current UTC time as 'YYYY-mm-dd HH:MM:SS', formatted once per second."""
+    global _last_stamp
+    sec = int(time.time())
+    if sec != _last_stamp[0]:
+        _last_stamp = (sec, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(sec)))
+    return _last_stamp[1]
+
+
+def log(msg: str) -> None:
+    """Simple timestamped logger."""
+    print(f"{utc_stamp()} | {msg}", flush=True)
+
+
+def _get_session():
+    """
+    The shared keep-alive requests.Session (TLS handshakes are amortised
+    across calls). requests is imported here, on first use.
+    """
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(
+                    # Everything goes to one host; keep one idle keep-alive
+                    # connection per worker thread so none get discarded
+                    pool_connections=1,
+                    pool_maxsize=HTTP_WORKERS,
+                    # Transient failures (rate limits, 5xx) are retried here,
+                    # with backoff, so they rarely reach the main loop
+                    max_retries=Retry(
+                        total=5,
+                        backoff_factor=0.5,
+                        status_forcelist=[429, 500, 502, 503, 504],
+                        respect_retry_after_header=True,
+                        allowed_methods=["GET"],
+                        # Hand back the last response once retries run out,
+                        # so _http_get can read its Retry-After header
+                        raise_on_status=False,
+                    ),
+                ))
+                session.headers["User-Agent"] = USER_AGENT
+                _SESSION = session
+    return _SESSION
+
+
+def _http_get(url: str, **kwargs):
+    """
+    GET through the shared session, within the API rate limit and
+    holding one of the _HTTP_SLOTS. Raises RateLimited on a final 429.
+    """
+    _HTTP_BUCKET.acquire()
+    with _HTTP_SLOTS:
+        resp = _get_session().get(url, timeout=10, **kwargs)
+    if resp.status_code == 429:
+        raise RateLimited(retry_after_seconds(resp))
+    return resp
+
+
+def ensure_trade_log_exists() -> None:
+    """Open the trade log for appends, writing the header if it's new."""
+    global _TRADE_FH, _TRADE_WRITER
+    if _TRADE_FH is not None:
+        return
+    is_new = not os.path.exists(TRADE_LOG)
+    _TRADE_FH = open(TRADE_LOG, "a", newline="")
+    _TRADE_WRITER = csv.writer(_TRADE_FH)
+    atexit.register(_TRADE_FH.close)
+    if is_new:
+        _TRADE_WRITER.writerow([
             "Timestamp",
             "Action",
             "Market",
@@ -104,230 +311,560 @@ if not os.path.exists(TRADE_LOG):
             "Profit_Loss"
         ])
 
-# ============================================================
-# HELPERS
-# ============================================================
 
-def log(msg: str) -> None:
-    """Simple timestamped logger."""
-    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-    print(f"{ts} | {msg}", flush=True)
+def retry_after_seconds(resp, default: float = 2.0) -> float:
+    """Seconds to wait according to a response's Retry-After header."""
+    try:
+        return max(0.0, float(resp.headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return default  # missing, or given as an HTTP date
 
 
-def get_candles(market: str, limit: int = LOOKBACK_CANDLES):
-    """Fetch recent candles for a market."""
+def _plan_candle_fetch(market: str, limit: int):
+    """
+    Decide what (if anything) must be downloaded for a market's candles.
+    Returns (cached, window_start, params); params is None when the cache
+    was fetched within CANDLE_TTL, or already holds the latest closed
+    bucket, stored after it closed.
+    """
     end_time = int(time.time())
+    bucket = end_time - end_time % CANDLE_GRANULARITY
     start_time = end_time - (limit * CANDLE_GRANULARITY)
 
-    start_iso = datetime.fromtimestamp(start_time, tz=timezone.utc).isoformat()
-    end_iso = datetime.fromtimestamp(end_time, tz=timezone.utc).isoformat()
+    cached = candle_cache.get(market)
+    newest = cached[-1, candle_cache.TS] if cached is not None and len(cached) else None
+    fetched_at = candle_cache.fetched_at(market)
+    # A newest candle that was still in progress when stored is stale: its
+    # close would be served as the current price
+    if newest is not None and fetched_at is not None and (
+            end_time - fetched_at < CANDLE_TTL
+            or (newest >= bucket - CANDLE_GRANULARITY
+                and fetched_at >= newest + CANDLE_GRANULARITY)):
+        return cached, start_time, None
+
+    # Only fetch what we are missing. The newest cached candle is refetched
+    # too, since it may have been an in-progress bucket when stored.
+    fetch_start = start_time
+    if newest is not None and newest > start_time:
+        fetch_start = int(newest)
 
-    url = f"{PUBLIC_API_BASE}/products/{market}/candles"
     params = {
-        "start": start_iso,
-        "end": end_iso,
+        "start": fetch_start,  # the API takes plain unix seconds
+        "end": end_time,
         "granularity": CANDLE_GRANULARITY
     }
+    return cached, start_time, params
 
-    resp = requests.get(url, params=params, timeout=10)
-    resp.raise_for_status()
-    candles = resp.json()
-    # Coinbase returns [time, low, high, open, close, volume]
-    if not candles:
-        return []
-    candles.sort(key=lambda c: c[0])
+
+def _store_candles(market: str, cached, fresh: list, window_start: int, limit: int):
+    """
+    Merge freshly downloaded candles into the cache and return the result,
+    a float64 (n, 2) array of [time, close] (see candle_cache).
+    """
+    # Coinbase returns [time, low, high, open, close, volume], newest first;
+    # flip it and keep [time, close] in one vectorised step
+    if not fresh:
+        return cached if cached is not None else _NO_CANDLES
+    candles = np.array(fresh, dtype=np.float64)[::-1, [0, 4]][-limit:]
+
+    # Splice: cached rows inside the window that fresh doesn't cover, then
+    # fresh (which wins on overlap). Both are ascending, so the rows to keep
+    # are one slice, trimmed so the result is at most `limit` rows.
+    if cached is not None:
+        ts = cached[:, candle_cache.TS]
+        hi = int(np.searchsorted(ts, candles[0, candle_cache.TS]))
+        lo = max(int(np.searchsorted(ts, window_start)), hi - (limit - len(candles)))
+        if lo < hi:
+            candles = np.concatenate((cached[lo:hi], candles))
+
+    candle_cache.put(market, candles)
     return candles
 
 
-def get_latest_price(market: str) -> Decimal | None:
-    """Fetch latest price for a market."""
-    url = f"{PUBLIC_API_BASE}/products/{market}/ticker"
-    resp = requests.get(url, timeout=10)
+def get_candles(market: str, limit: int = LOOKBACK_CANDLES):
+    """
+    Fetch recent candles for a market.
+    Served from the candle cache while it already holds the latest closed
+    bucket; otherwise only the missing tail is downloaded and merged in.
+    """
+    cached, window_start, params = _plan_candle_fetch(market, limit)
+    if params is None:
+        return cached
+
+    url = CANDLES_URL_TMPL.format(market)
+    resp = _http_get(url, params=params)
+    resp.raise_for_status()
+    return _store_candles(market, cached, json_loads(resp.content), window_start, limit)
+
+
+async def _fetch_candles_async(session, semaphore, market: str, limit: int = LOOKBACK_CANDLES):
+    """Async twin of get_candles, sharing the same candle cache."""
+    cached, window_start, params = _plan_candle_fetch(market, limit)
+    if params is None:
+        return cached
+
+    url = CANDLES_URL_TMPL.format(market)
+    timeout = aiohttp.ClientTimeout(total=10)
+    await _HTTP_BUCKET.acquire_async()
+    async with semaphore:
+        async with session.get(url, params=params, timeout=timeout) as resp:
+            if resp.status == 429:
+                raise RateLimited(retry_after_seconds(resp))
+            resp.raise_for_status()
+            fresh = json_loads(await resp.read())
+    return _store_candles(market, cached, fresh, window_start, limit)
+
+
+async def _scan_all(markets: list) -> list:
+    """Fetch candles for all markets concurrently over one HTTP session."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    connector = aiohttp.TCPConnector(limit=16)
+    headers = {"User-Agent": USER_AGENT}
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        return await asyncio.gather(
+            *(_fetch_candles_async(session, semaphore, m) for m in markets),
+            return_exceptions=True,
+        )
+
+
+def fetch_all_candles(markets: list) -> dict:
+    """
+    Fetch candles for several markets at once.
+    Returns market -> candles, or the exception raised for that market.
+    If any request was rate limited, RateLimited is raised instead (with
+    the longest wait asked for), so the whole cycle backs off.
+    """
+    if aiohttp is not None:
+        results = asyncio.run(_scan_all(markets))
+    else:
+        futures = [EXECUTOR.submit(get_candles, m) for m in markets]
+        results = [f.exception() or f.result() for f in futures]
+    limited = [r for r in results if isinstance(r, RateLimited)]
+    if limited:
+        raise max(limited, key=lambda e: e.retry_after)
+    return dict(zip(markets, results))
+
+
+def get_latest_price(market: str) -> float | None:
+    """Fetch latest price for a market (cached for TICKER_TTL)."""
+    cached = _TICKER_CACHE.get(market)
+    if cached is not None and time.monotonic() - cached[0] < TICKER_TTL:
+        return cached[1]
+
+    url = TICKER_URL_TMPL.format(market)
+    resp = _http_get(url)
     if resp.status_code != 200:
         return None
-    data = resp.json()
-    return Decimal(str(data["price"]))
+    data = json_loads(resp.content)
+    price = float(data["price"])
+    _TICKER_CACHE[market] = (time.monotonic(), price)
+    return price
 
 
-def sma(values, period: int) -> Decimal | None:
-    if len(values) < period:
-        return None
-    return sum(values[-period:]) / Decimal(period)
+async def _ticker_feed() -> None:
+    """
+    Stream ticker prices for the markets in _ws_markets into _TICKS,
+    following subscription changes. The socket is only open while some
+    market is held, since the feed drops connections with no subscription.
+    """
+    while True:
+        if not _ws_markets:
+            await asyncio.sleep(1)
+            continue
+        try:
+            async with websockets.connect(WS_FEED_URL) as ws:
+                subscribed = frozenset()
+                while True:
+                    wanted = _ws_markets
+                    if not wanted:
+                        break  # nothing held any more: close the socket
+                    for kind, ids in (("unsubscribe", subscribed - wanted),
+                                      ("subscribe", wanted - subscribed)):
+                        if ids:
+                            await ws.send(json.dumps({
+                                "type": kind, "product_ids": sorted(ids), "channels": ["ticker"],
+                            }))
+                    subscribed = wanted
+
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=1)
+                    except asyncio.TimeoutError:
+                        continue  # re-check the subscriptions
+                    msg = json_loads(raw)
+                    if msg.get("type") == "ticker" and msg.get("price"):
+                        _TICKS.put((msg["product_id"], float(msg["price"])))
+            continue
+        except websockets.exceptions.ConnectionClosedOK:
+            pass  # closed normally by the server; reconnect quietly
+        except Exception as e:
+            log(f"Ticker feed error: {e}. Using REST prices, reconnecting in {WS_RECONNECT_SECONDS}s.")
+        await asyncio.sleep(WS_RECONNECT_SECONDS)
 
 
-def rsi(values, period: int = 14) -> Decimal | None:
-    if len(values) <= period:
-        return None
-    gains = []
-    losses = []
-    for i in range(1, period + 1):
-        diff = values[-i] - values[-i - 1]
-        if diff > 0:
-            gains.append(diff)
-        else:
-            losses.append(-diff)
-    if not gains and not losses:
-        return Decimal(50)
-    avg_gain = sum(gains) / Decimal(period) if gains else Decimal(0)
-    avg_loss = sum(losses) / Decimal(period) if losses else Decimal(0)
-    if avg_loss == 0:
-        return Decimal(100)
-    rs = avg_gain / avg_loss
-    return Decimal(100) - (Decimal(100) / (Decimal(1) + rs))
-
-
-def volatility(values) -> Decimal | None:
-    """Average absolute % change per candle."""
-    if len(values) < 2:
-        return None
-    moves = []
-    for i in range(1, len(values)):
-        if values[i - 1] == 0:
-            continue
-        pct = (values[i] - values[i - 1]) / values[i - 1]
-        moves.append(abs(pct))
-    if not moves:
-        return None
-    return sum(moves) / Decimal(len(moves))
+def start_ticker_feed() -> bool:
+    """Run _ticker_feed on a daemon thread; False if websockets is missing."""
+    if websockets is None:
+        return False
+    threading.Thread(target=asyncio.run, args=(_ticker_feed(),), daemon=True).start()
+    return True
 
 
-def score_market(market: str):
+def drain_ticks() -> None:
+    """Fold every queued websocket tick into the ticker cache."""
+    while True:
+        try:
+            market, price = _TICKS.get_nowait()
+        except queue.Empty:
+            return
+        _TICKER_CACHE[market] = (time.monotonic(), price)
+
+
+def market_metrics(market: str, candles: np.ndarray) -> tuple:
     """
-    Return a score for this market based on trend, RSI, volatility.
-    Higher = more attractive. If unsuitable, score -999.
+    (short_ma, long_ma, rsi, volatility, price) for a market's [time, close]
+    candles; all NaN if there are too few candles.
+    Only candles added/revised since the last call are folded in.
     """
-    try:
-        candles = get_candles(market)
-    except Exception as e:
-        log(f"Error fetching candles for {market}: {e}")
-        return Decimal("-999"), None, None
+    if len(candles) < 30:
+        return _NO_METRICS
 
-    if not candles or len(candles) < 30:
-        return Decimal("-999"), None, None
+    state = _INDICATOR_STATE.get(market)
+    if state is None:
+        state = _INDICATOR_STATE[market] = indicators.IndicatorState()
+    closes = np.ascontiguousarray(candles[:, candle_cache.CLOSE])
+    ts = candles[:, candle_cache.TS]
+    return (*state.sync(ts, closes), float(closes[-1]))
 
-    closes = [Decimal(str(c[4])) for c in candles]
 
-    short_ma = sma(closes, 9)
-    long_ma = sma(closes, 21)
-    current_rsi = rsi(closes, 14)
-    vol = volatility(closes)
+def _make_score_kernel(min_trend: float, rsi_min: float, rsi_max: float,
+                       min_vol: float, max_vol: float):
+    """
+    Build the scoring kernel with the filter thresholds captured as
+    constants, so numba compiles them straight into the comparisons.
+    """
+    @njit
+    def kernel(metrics):
+        n = metrics.shape[0]
+        scores = np.full(n, -999.0)
+        for i in range(n):
+            short_ma, long_ma, rsi, vol = metrics[i, 0], metrics[i, 1], metrics[i, 2], metrics[i, 3]
+            if long_ma == 0:
+                continue
+            trend = (short_ma - long_ma) / long_ma
+
+            # Filters – must all pass (any NaN fails them)
+            if (trend > min_trend and rsi_min <= rsi <= rsi_max
+                    and min_vol <= vol <= max_vol):
+                # Simple score: stronger trend & healthy volatility
+                scores[i] = trend * 1000 + (max_vol - vol) * 10
+        return scores
+
+    return kernel
+
+
+def configure_scoring() -> None:
+    """(Re)build the scoring kernel; call again after changing thresholds."""
+    global _score_kernel
+    _score_kernel = _make_score_kernel(
+        MIN_TREND_STRENGTH, RSI_BUY_MIN, RSI_BUY_MAX, MIN_VOLATILITY, MAX_VOLATILITY,
+    )
 
-    if short_ma is None or long_ma is None or current_rsi is None or vol is None:
-        return Decimal("-999"), None, None
 
-    trend = (short_ma - long_ma) / long_ma
+configure_scoring()
 
-    # Filters – must all pass
-    if trend <= MIN_TREND_STRENGTH:
-        return Decimal("-999"), None, None
-    if not (RSI_BUY_MIN <= current_rsi <= RSI_BUY_MAX):
-        return Decimal("-999"), None, None
-    if not (MIN_VOLATILITY <= vol <= MAX_VOLATILITY):
-        return Decimal("-999"), None, None
 
-    # Simple score: stronger trend & healthy volatility
-    score = trend * Decimal("1000") + (MAX_VOLATILITY - vol) * Decimal("10")
-    price_now = closes[-1]
-    return score, price_now, closes
+def score_metrics(metrics: np.ndarray) -> np.ndarray:
+    """
+    Score every row of an (n_markets, 4+) array of
+    (short_ma, long_ma, rsi, volatility, ...) in one compiled pass.
+    Higher = more attractive; -999 where any filter fails (or data is NaN).
+    """
+    return _score_kernel(metrics)
 
 
-def get_random_scan_list():
-    """Pick a random subset of ALL_MARKETS to scan this cycle."""
-    n = min(MAX_MARKETS_PER_SCAN, len(ALL_MARKETS))
-    return random.sample(ALL_MARKETS, k=n)
+def get_all_24h_stats() -> dict[str, dict]:
+    """
+    24h stats (open/high/low/last/volume) for every product in one request.
+    Returns {} if the call fails; callers then skip stats-based filtering.
+    """
+    try:
+        resp = _http_get(f"{PUBLIC_API_BASE}/products/stats")
+        resp.raise_for_status()
+        data = json_loads(resp.content)
+    except RateLimited:
+        raise  # the main loop backs off
+    except Exception as e:
+        log(f"Error fetching 24h stats: {e}")
+        return {}
+    return {m: s.get("stats_24hour", s) for m, s in data.items() if isinstance(s, dict)}
+
+
+def eligible_markets(stats: dict[str, dict]) -> list:
+    """
+    ALL_MARKETS whose 24h range could plausibly pass the per-candle
+    volatility filter. Markets without stats are kept.
+    """
+    lo = MIN_VOLATILITY * STATS_RANGE_FACTOR
+    hi = MAX_VOLATILITY * STATS_RANGE_FACTOR
+    eligible = []
+    for m in ALL_MARKETS:
+        s = stats.get(m)
+        try:
+            day_range = (float(s["high"]) - float(s["low"])) / float(s["low"])
+        except (TypeError, KeyError, ValueError, ZeroDivisionError):
+            eligible.append(m)
+            continue
+        if lo <= day_range <= hi:
+            eligible.append(m)
+    return eligible
+
+
+@functools.lru_cache(maxsize=1)
+def _eligible_markets(bucket: int) -> tuple[str, ...]:
+    """
+    eligible_markets() for one STATS_REFRESH_SECONDS time bucket.
+    Raises LookupError (so nothing is cached) when the stats are unavailable.
+    """
+    stats = get_all_24h_stats()
+    if not stats:
+        raise LookupError("no 24h stats")
+    return tuple(eligible_markets(stats))
+
+
+def load_market_ema() -> int:
+    """
+    Load persisted score EMAs from MARKET_EMA_FILE; return how many.
+    A missing or malformed file, or any non-numeric entry, is skipped.
+    """
+    try:
+        with open(MARKET_EMA_FILE) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return 0  # first run or unreadable file: start cold
+    if not isinstance(saved, dict):
+        return 0
+
+    for m, v in saved.items():
+        if isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v):
+            # Floor older entries that averaged in the -999 marker
+            market_score_ema[m] = max(float(v), EMA_FAIL_SCORE)
+    return len(market_score_ema)
+
+
+def update_market_ema(markets, scores) -> None:
+    """Fold this cycle's scores into the per-market EMA and persist it."""
+    for m, score in zip(markets, scores):
+        prev = market_score_ema.get(m)
+        score = EMA_FAIL_SCORE if score <= -999 else float(score)
+        market_score_ema[m] = score if prev is None else (1 - EMA_ALPHA) * prev + EMA_ALPHA * score
+
+    os.makedirs(os.path.dirname(MARKET_EMA_FILE), exist_ok=True)
+    tmp = f"{MARKET_EMA_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(market_score_ema, f)
+    os.replace(tmp, MARKET_EMA_FILE)
+
+
+def get_random_scan_list(skip=frozenset()):
+    """
+    Markets to scan this cycle: the best-ranked by score EMA (only those
+    above EMA_RANK_MIN), topped up with the next markets of the shuffled
+    ALL_MARKETS rotation for exploration. Markets in `skip`, or ruled out by 24h stats, are left out.
+    """
+    global _scan_cursor
+    try:
+        eligible = set(_eligible_markets(int(time.time()) // STATS_REFRESH_SECONDS))
+    except LookupError:
+        eligible = set(ALL_MARKETS)  # unfiltered; stats are retried next cycle
+    eligible -= set(skip)
+    n = min(MAX_MARKETS_PER_SCAN, len(eligible))
+
+    ranked = sorted(
+        (m for m in eligible if market_score_ema.get(m, EMA_FAIL_SCORE) > EMA_RANK_MIN),
+        key=market_score_ema.get,
+        reverse=True,
+    )
+    window = ranked[:int(EXPLOIT_FRACTION * n)]
+
+    for _ in range(2 * len(_scan_perm)):
+        if len(window) == n:
+            break
+        if _scan_cursor == len(_scan_perm):
+            # Pass finished: start a freshly shuffled one
+            random.shuffle(_scan_perm)
+            _scan_cursor = 0
+        m = _scan_perm[_scan_cursor]
+        _scan_cursor += 1
+        if m in eligible and m not in window:
+            window.append(m)
+    return window
 
 
 def log_trade(action, market, price, amount, equity_value, profit_loss):
     global usd_balance, positions
-    with open(TRADE_LOG, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-            action,
-            market,
-            f"{price:.8f}",
-            f"{amount:.8f}",
-            f"{usd_balance:.2f}",
-            len(positions),
-            f"{equity_value:.2f}",
-            f"{profit_loss:.2f}",
-        ])
+    _TRADE_WRITER.writerow([
+        utc_stamp(),
+        action,
+        market,
+        f"{price:.8f}",
+        f"{amount:.8f}",
+        f"{usd_balance:.2f}",
+        position_count(),
+        f"{equity_value:.2f}",
+        f"{profit_loss:.2f}",
+    ])
+
+
+def snapshot_prices(markets) -> dict:
+    """Fetch latest prices for several markets concurrently."""
+    markets = list(markets)
+    return dict(zip(markets, EXECUTOR.map(get_latest_price, markets)))
+
+
+def position_count() -> int:
+    return len(positions["market"])
+
+
+def _follow_positions() -> None:
+    """Point the ticker feed at the markets currently held."""
+    global _ws_markets
+    _ws_markets = frozenset(positions["market"])
+
+
+def add_position(market: str, amount: float, entry_price: float, entry_time) -> None:
+    positions["market"].append(market)
+    positions["amount"] = np.append(positions["amount"], amount)
+    positions["entry_price"] = np.append(positions["entry_price"], entry_price)
+    positions["entry_time"].append(entry_time)
+    _follow_positions()
+
+
+def pop_position(i: int):
+    """Remove row i from positions; return (market, amount, entry_price, entry_time)."""
+    row = (
+        positions["market"].pop(i),
+        float(positions["amount"][i]),
+        float(positions["entry_price"][i]),
+        positions["entry_time"].pop(i),
+    )
+    positions["amount"] = np.delete(positions["amount"], i)
+    positions["entry_price"] = np.delete(positions["entry_price"], i)
+    _follow_positions()
+    return row
 
 
-def current_equity():
-    """USD + value of all open positions at latest prices."""
-    total = usd_balance
-    for pos in positions:
-        price = get_latest_price(pos["market"])
+def exit_triggered(market: str, price: float) -> bool:
+    """True if a held market at this price has reached its TP or SL."""
+    try:
+        i = positions["market"].index(market)
+    except ValueError:
+        return False
+    entry = positions["entry_price"][i]
+    change_pct = (price - entry) / entry
+    return change_pct >= TAKE_PROFIT_PCT or change_pct <= STOP_LOSS_PCT
+
+
+def sleep_until(deadline: float) -> None:
+    """
+    Sleep until the monotonic deadline, folding websocket ticks into the
+    ticker cache as they arrive. Wakes early when a tick pushes a held
+    position to its TP/SL, so the next cycle can close it straight away.
+    """
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        try:
+            market, price = _TICKS.get(timeout=remaining)
+        except queue.Empty:
+            return
+        _TICKER_CACHE[market] = (time.monotonic(), price)
+        if exit_triggered(market, price):
+            log(f"{market} @ {price:.2f} reached TP/SL, waking up early.")
+            return
+
+
+def current_equity(prices: dict) -> float:
+    """USD + value of all open positions at the given prices (float)."""
+    total = float(usd_balance)
+    for market, amount in zip(positions["market"], positions["amount"]):
+        price = prices.get(market)
         if price is None:
             continue
-        total += pos["amount"] * price
+        total += float(amount) * price
     return total
 
 
 def choose_best_market():
     """
-    Scan a random subset of markets and return the best candidate
-    that we are NOT already holding.
+    Scan this cycle's subset of markets (see get_random_scan_list) and
+    return the best candidate that we are NOT already holding.
     """
-    scan_list = get_random_scan_list()
-    log(f"Scanning {len(scan_list)} random markets this cycle...")
-
     # Don't re-buy markets we already hold
-    held_markets = {p["market"] for p in positions}
+    scan_list = get_random_scan_list(skip=set(positions["market"]))
+    log(f"Scanning {len(scan_list)} markets this cycle...")
 
-    best = (Decimal("-999"), None, None, None)  # score, market, price, closes
-    for m in scan_list:
-        if m in held_markets:
+    # Candle fetches are I/O-bound: download them all at once, then score
+    all_candles = fetch_all_candles(scan_list)
+
+    markets, rows = [], []
+    for m, candles in all_candles.items():
+        if isinstance(candles, Exception):
+            log(f"Error fetching candles for {m}: {candles}")
             continue
-        score, price, closes = score_market(m)
+        markets.append(m)
+        rows.append(market_metrics(m, candles))
+
+    if not rows:
+        log("No suitable market found this cycle.")
+        return None, None
+
+    metrics = np.array(rows, dtype=np.float64)
+    scores = score_metrics(metrics)
+    for m, score in zip(markets, scores):
         log(f"Market {m} score {score:.4f}")
-        if price is None:
-            continue
-        if score > best[0]:
-            best = (score, m, price, closes)
+    update_market_ema(markets, scores)
 
-    if best[1] is None or best[0] <= Decimal("-999"):
+    best = int(scores.argmax())
+    if scores[best] <= -999:
         log("No suitable market found this cycle.")
         return None, None
 
-    log(f"Best candidate this cycle: {best[1]} with score {best[0]:.4f}")
-    return best[1], best[2]
+    log(f"Best candidate this cycle: {markets[best]} with score {scores[best]:.4f}")
+    return markets[best], float(metrics[best, 4])
 
 
-def close_position(pos, reason: str):
+def close_position(market: str, amount: float, entry_price: float,
+                   price: float, reason: str, prices: dict):
     """
-    Close a position at current market price.
+    Close an already-removed position at the given market price.
     Updates usd_balance, trade logs, equity, losing streak.
+    `prices` is this cycle's price snapshot, used for the equity figure.
     """
     global usd_balance, trade_count, losing_streak, equity_peak_today
 
-    price = get_latest_price(pos["market"])
-    if price is None:
-        log(f"Could not fetch price to close {pos['market']}. Skipping.")
-        return
-
-    entry_value = pos["amount"] * pos["entry_price"]
-    exit_value = pos["amount"] * price
+    amount = to_decimal(amount)
+    entry_value = amount * to_decimal(entry_price)
+    exit_value = amount * to_decimal(price)
     profit_loss = exit_value - entry_value
 
     usd_balance += exit_value
     trade_count += 1
     losing_streak = losing_streak + 1 if profit_loss < 0 else 0
 
-    equity = current_equity()
+    equity = current_equity(prices)
     if equity > equity_peak_today:
         equity_peak_today = equity
 
     log(
-        f"CLOSE {pos['market']} @ {price:.2f} "
+        f"CLOSE {market} @ {price:.2f} "
         f"({reason}) | P/L: {profit_loss:+.2f} | Equity ≈ ${equity:.2f}"
     )
     log_trade(
         action=f"SELL_{reason}",
-        market=pos["market"],
+        market=market,
         price=price,
-        amount=pos["amount"],
+        amount=amount,
         equity_value=equity,
         profit_loss=profit_loss,
     )
@@ -338,7 +875,8 @@ def close_position(pos, reason: str):
 # ============================================================
 
 def main_loop():
-    global usd_balance, positions, equity_peak_today, today, trading_paused_for_today, losing_streak
+    global usd_balance, equity_peak_today, today, trading_paused_for_today, losing_streak
+    import requests  # only needed here for its exception types
 
     log("============================================================")
     log("CRYPTO PAPER-TRADING BOT (RANDOM MULTI-MARKET SCAN)")
@@ -347,50 +885,63 @@ def main_loop():
     log(f"Risk mode: {RISK_MODE}")
     log("============================================================")
 
+    ensure_trade_log_exists()
+    indicators.warmup()
+    score_metrics(np.ones((1, 5)))  # compile the scoring kernel too
+    log(f"Loaded cached candles for {candle_cache.load_all()} markets.")
+    log(f"Loaded score EMAs for {load_market_ema()} markets.")
+    if not start_ticker_feed():
+        log("websockets not installed; open positions are priced by REST polling.")
+
     while True:
+        # Fixed cycle rate: time spent working comes out of the sleep
+        cycle_deadline = time.monotonic() + SLEEP_SECONDS
         try:
             now = datetime.now(timezone.utc)
 
+            # One price snapshot per cycle, shared by TP/SL, equity and logs.
+            # Held markets streamed by the ticker feed are served from cache.
+            drain_ticks()
+            prices = snapshot_prices(set(positions["market"]))
+
             # Reset daily drawdown tracking at start of new UTC day
             if now.date() != today:
                 today = now.date()
-                equity_peak_today = current_equity()
+                equity_peak_today = current_equity(prices)
                 trading_paused_for_today = False
                 losing_streak = 0
                 log("----- New day: resetting daily stats (peak equity, losing streak, pause flag) -----")
 
-            # 1) Update existing positions (check TP/SL)
-            still_open = []
-            for pos in positions:
-                price = get_latest_price(pos["market"])
-                if price is None:
-                    still_open.append(pos)
-                    continue
-
-                change_pct = (price - pos["entry_price"]) / pos["entry_price"]
-
-                if change_pct >= TAKE_PROFIT_PCT:
-                    close_position(pos, "TAKE_PROFIT")
-                elif change_pct <= STOP_LOSS_PCT:
-                    close_position(pos, "STOP_LOSS")
-                else:
-                    still_open.append(pos)
+            # 1) Update existing positions (check TP/SL), vectorised.
+            # Missing prices become NaN, which never triggers a close.
+            prices_vec = np.array(
+                [np.nan if prices[m] is None else prices[m] for m in positions["market"]],
+                dtype=np.float64,
+            )
+            entry = positions["entry_price"]
+            change_pct = (prices_vec - entry) / entry
+            take_profit = change_pct >= TAKE_PROFIT_PCT
+            close_idx = np.flatnonzero(take_profit | (change_pct <= STOP_LOSS_PCT))
 
-            positions = still_open
+            # Remove each row before closing it so equity isn't double counted
+            for k, i in enumerate(close_idx):
+                market, amount, entry_price, _ = pop_position(i - k)
+                reason = "TAKE_PROFIT" if take_profit[i] else "STOP_LOSS"
+                close_position(market, amount, entry_price, prices[market], reason, prices)
 
             # 2) Compute current equity & check drawdown
-            equity = current_equity()
+            equity = current_equity(prices)
             if equity > equity_peak_today:
                 equity_peak_today = equity
 
-            dd = (equity_peak_today - equity) / equity_peak_today if equity_peak_today > 0 else Decimal(0)
+            dd = (equity_peak_today - equity) / equity_peak_today if equity_peak_today > 0 else 0.0
 
             if dd >= MAX_DAILY_DRAWDOWN:
                 trading_paused_for_today = True
 
             # 3) Log a quick summary every loop
             log(
-                f"Summary: USD=${usd_balance:.2f}, positions={len(positions)}, "
+                f"Summary: USD=${usd_balance:.2f}, positions={position_count()}, "
                 f"Equity≈${equity:.2f}, DD={dd * 100:.2f}%, LosingStreak={losing_streak}"
             )
 
@@ -399,29 +950,24 @@ def main_loop():
                 log("Daily drawdown limit hit. Pausing new entries for the rest of the day.")
             elif losing_streak >= MAX_LOSING_STREAK:
                 log(f"Losing streak {losing_streak} ≥ {MAX_LOSING_STREAK}. Pausing new entries this cycle.")
-            elif len(positions) >= MAX_OPEN_POSITIONS:
+            elif position_count() >= MAX_OPEN_POSITIONS:
                 log(f"Max open positions ({MAX_OPEN_POSITIONS}) reached. Not opening new trades this cycle.")
             else:
                 # 5) Look for a new entry
                 market, price = choose_best_market()
                 if market and price:
                     # position sizing
-                    usd_to_spend = (usd_balance * POSITION_SIZE_FRACTION).quantize(Decimal("0.01"))
-                    if usd_to_spend > Decimal("5"):   # min trade size (sim only)
-                        amount = (usd_to_spend / price).quantize(Decimal("0.00000001"))
+                    usd_to_spend = (usd_balance * POSITION_SIZE_FRACTION).quantize(USD_QUANTUM)
+                    if usd_to_spend > MIN_TRADE_USD:
+                        amount = (usd_to_spend / to_decimal(price)).quantize(COIN_QUANTUM)
                         usd_balance -= usd_to_spend
-                        pos = {
-                            "market": market,
-                            "amount": amount,
-                            "entry_price": price,
-                            "entry_time": now
-                        }
-                        positions.append(pos)
-                        entry_equity = current_equity()
+                        add_position(market, float(amount), price, now)
+                        prices[market] = price
+                        entry_equity = current_equity(prices)
                         log(
                             f"OPEN {market} @ {price:.2f} | "
                             f"Spend=${usd_to_spend:.2f}, Amount={amount:.8f}, "
-                            f"Positions now={len(positions)}"
+                            f"Positions now={position_count()}"
                         )
                         log_trade(
                             action="BUY",
@@ -429,19 +975,30 @@ def main_loop():
                             price=price,
                             amount=amount,
                             equity_value=entry_equity,
-                            profit_loss=Decimal("0.00"),
+                            profit_loss=ZERO_USD,
                         )
                     else:
                         log(f"Not enough USD to open new trade (would spend ${usd_to_spend:.2f}).")
 
-            # 6) Sleep until next cycle
-            log(f"Sleeping for {SLEEP_SECONDS} seconds...\n")
-            time.sleep(SLEEP_SECONDS)
-
+        except RateLimited as e:
+            # Still throttled after retries: wait as long as the API asks
+            # before trying the cycle again
+            log(f"Rate limited in main loop. Retrying in {e.retry_after:.0f} seconds...")
+            time.sleep(e.retry_after)
+            continue
+        except (requests.ConnectionError, requests.Timeout) as e:
+            log(f"Network error in main loop: {e}. Retrying in 2 seconds...")
+            time.sleep(2)
+            continue
         except Exception as e:
             log(f"Error in main loop: {e}")
-            # short sleep to avoid tight crash loop
-            time.sleep(10)
+        finally:
+            _TRADE_FH.flush()
+
+        # 6) Sleep until next cycle
+        remaining = max(0.0, cycle_deadline - time.monotonic())
+        log(f"Sleeping for {remaining:.0f} seconds...\n")
+        sleep_until(cycle_deadline)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimited(Exception):
+    """The API still answered 429 after retries; wait retry_after seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second on average, in
+    bursts of up to `capacity`. One bucket can be shared by threads and
+    by coroutines (via acquire_async).
+    """
+
+    def __init__(self, rate: float = 3, capacity: int = 6):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if one is available (0.0), else the seconds until one is."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        wait = self._take()
+        while wait > 0:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def acquire_async(self) -> None:
+        """acquire() for coroutines: waits without blocking the event loop."""
+        wait = self._take()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._take()
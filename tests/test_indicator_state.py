@@ -0,0 +1,63 @@
+"""
+Fuzz check: IndicatorState.sync() must always match a from-scratch
+indicators.compute() over the same closes.
+
+Run from the repo root with: python -m unittest
+"""
+import unittest
+
+import numpy as np
+
+import indicators
+
+G = 300.0  # candle spacing
+
+
+def _step(rng, ts, closes, window):
+    """One random cycle: maybe revise the newest close, add 0-3 candles,
+    sometimes drop an interior candle (Coinbase skips empty buckets), trim."""
+    ts, closes = ts.copy(), closes.copy()
+    if rng.random() < 0.5 and len(closes):
+        closes[-1] += rng.normal()
+    k = int(rng.integers(0, 4))
+    last = ts[-1] if len(ts) else 0.0
+    ts = np.concatenate((ts, last + G * np.arange(1, k + 1)))
+    closes = np.concatenate((closes, 100 + rng.normal(0, 3, k)))
+    if rng.random() < 0.05 and len(ts) > 3:
+        j = int(rng.integers(1, len(ts) - 1))
+        ts, closes = np.delete(ts, j), np.delete(closes, j)
+    return ts[-window:], closes[-window:]
+
+
+class IndicatorStateTest(unittest.TestCase):
+
+    def assert_matches(self, state, ts, closes):
+        got = state.sync(ts, closes)
+        want = indicators.compute(closes)
+        np.testing.assert_allclose(got, want, rtol=1e-9, atol=1e-9, equal_nan=True,
+                                   err_msg=f"{len(closes)} closes")
+
+    def test_sync_matches_compute(self):
+        rng = np.random.default_rng(5)
+        for trial in range(200):
+            window = int(rng.integers(1, 110))
+            ts = np.arange(window) * G
+            closes = 100 + np.cumsum(rng.normal(0, 1, window))
+            if trial % 5 == 0:
+                closes = np.round(closes)  # flat moves: zero RSI diffs
+            state = indicators.IndicatorState()
+            self.assert_matches(state, ts, closes)
+            for _ in range(150):
+                ts, closes = _step(rng, ts, closes, window)
+                self.assert_matches(state, ts, closes)
+
+    def test_reseeds_after_unrelated_window(self):
+        state = indicators.IndicatorState()
+        ts = np.arange(50) * G
+        self.assert_matches(state, ts, np.linspace(100, 110, 50))
+        # Older data than held (e.g. cache reset) forces a full reseed
+        self.assert_matches(state, ts - 10 * G, np.linspace(90, 95, 50))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+get_random_scan_list: exploit slots go only to markets with a real score
+EMA; everything else is spread evenly by the shuffled rotation. Also
+checks that load_market_ema survives corrupt files.
+
+Run from the repo root with: python -m unittest
+"""
+import json
+import os
+import random
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+
+import main
+
+CYCLES = 30
+
+
+class ScanSelectionTest(unittest.TestCase):
+
+    def setUp(self):
+        # No network: without 24h stats every market is eligible
+        patcher = mock.patch.object(main, "_eligible_markets", side_effect=LookupError)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        random.seed(1)
+        main._scan_perm = main.ALL_MARKETS.copy()
+        random.shuffle(main._scan_perm)
+        main._scan_cursor = 0
+
+    def scan_counts(self, emas):
+        with mock.patch.dict(main.market_score_ema, emas, clear=True):
+            counts = Counter()
+            for _ in range(CYCLES):
+                window = main.get_random_scan_list()
+                self.assertEqual(len(window), main.MAX_MARKETS_PER_SCAN)
+                self.assertEqual(len(set(window)), len(window))
+                counts.update(window)
+        return counts
+
+    def assert_even(self, counts, markets):
+        """Each market within 25% of its fair share of the rotation's slots
+        (pass boundaries make the rotation itself drift a little)."""
+        fair = sum(counts[m] for m in markets) / len(markets)
+        for m in markets:
+            self.assertLessEqual(abs(counts[m] - fair), fair / 4, counts)
+
+    def test_all_failing_markets_rotate_evenly(self):
+        emas = dict.fromkeys(main.ALL_MARKETS, main.EMA_FAIL_SCORE)
+        self.assert_even(self.scan_counts(emas), main.ALL_MARKETS)
+
+    def test_cold_start_rotates_evenly(self):
+        self.assert_even(self.scan_counts({}), main.ALL_MARKETS)
+
+    def test_only_real_scores_get_exploit_slots(self):
+        strong, decayed = main.ALL_MARKETS[0], main.ALL_MARKETS[1]
+        emas = dict.fromkeys(main.ALL_MARKETS, main.EMA_FAIL_SCORE)
+        emas[strong] = 20.0
+        emas[decayed] = 0.7 ** 12 * 20.0  # one old pass, long since failing
+        counts = self.scan_counts(emas)
+        self.assertEqual(counts[strong], CYCLES)
+        self.assert_even(counts, main.ALL_MARKETS[1:])
+
+
+class LoadMarketEmaTest(unittest.TestCase):
+
+    def load(self, content):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "market_ema.json")
+            with open(path, "w") as f:
+                f.write(content)
+            with mock.patch.object(main, "MARKET_EMA_FILE", path), \
+                    mock.patch.dict(main.market_score_ema, clear=True):
+                return main.load_market_ema(), dict(main.market_score_ema)
+
+    def test_malformed_files_start_cold(self):
+        for content in ("", "not json", "[1, 2]", '"BTC-USD"', "null"):
+            self.assertEqual(self.load(content), (0, {}), content)
+
+    def test_bad_entries_are_skipped(self):
+        saved = {"BTC-USD": None, "ETH-USD": "3", "SOL-USD": True,
+                 "ADA-USD": 4.5, "LTC-USD": -300.0, "OP-USD": float("nan")}
+        count, emas = self.load(json.dumps(saved))
+        self.assertEqual(emas, {"ADA-USD": 4.5, "LTC-USD": main.EMA_FAIL_SCORE})
+        self.assertEqual(count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
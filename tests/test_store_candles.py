@@ -0,0 +1,78 @@
+"""
+Fuzz check: main._store_candles' array splice must match a naive
+dedup-by-timestamp merge of the cached and freshly fetched candles.
+
+Run from the repo root with: python -m unittest
+"""
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import main
+
+G = main.CANDLE_GRANULARITY
+
+
+def _naive_merge(cached, fresh, window_start, limit):
+    """Cached rows inside the window, overwritten by fresh rows on the same
+    timestamp, sorted by time, newest `limit` kept."""
+    rows = {}
+    if cached is not None:
+        for t, c in cached:
+            if t >= window_start:
+                rows[t] = c
+    for candle in fresh:
+        rows[candle[0]] = candle[4]
+    return np.array([(t, rows[t]) for t in sorted(rows)], dtype=np.float64)[-limit:]
+
+
+def _random_case(rng):
+    """
+    A cache (possibly missing, with gaps like Coinbase's skipped empty
+    buckets) plus a fetch as the bot makes it: a contiguous run of buckets,
+    newest first, starting inside the window and reaching at least as far
+    as the cache.
+    """
+    limit = int(rng.integers(5, 40))
+    window_start = int(rng.integers(0, 40)) * G
+    cached = None
+    newest = 0
+    if rng.random() > 0.2:
+        n = int(rng.integers(0, 50))
+        ts = int(rng.integers(0, 30)) * G + G * np.arange(n)
+        ts = ts[rng.random(n) > 0.1]
+        cached = np.column_stack((ts, rng.random(len(ts)))).astype(np.float64)
+        newest = int(ts[-1]) if len(ts) else 0
+    start = max(window_start, int(rng.integers(0, 60)) * G)
+    end = max(start, newest) + int(rng.integers(0, 5)) * G
+    fresh = [[float(t), 1.0, 2.0, 1.5, float(rng.random()), 10.0]
+             for t in range(end, start - 1, -G)]
+    return cached, fresh, window_start, limit
+
+
+class StoreCandlesTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(main.candle_cache, "put")  # no disk writes
+        self.put = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_splice_matches_naive_merge(self):
+        rng = np.random.default_rng(0)
+        for _ in range(3000):
+            cached, fresh, window_start, limit = _random_case(rng)
+            got = main._store_candles("X-USD", cached, fresh, window_start, limit)
+            want = _naive_merge(cached, fresh, window_start, limit)
+            np.testing.assert_array_equal(got, want)
+            self.put.assert_called_with("X-USD", got)
+
+    def test_empty_fetch_keeps_cache(self):
+        cached = np.array([[0.0, 1.0], [G, 2.0]])
+        self.assertIs(main._store_candles("X-USD", cached, [], 0, 10), cached)
+        self.assertEqual(len(main._store_candles("X-USD", None, [], 0, 10)), 0)
+        self.put.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()